@@ -0,0 +1,5 @@
+-- Adds api_keys.last_used_at, written in batches by the API key usage flusher.
+-- init_db's create_all only creates missing tables, so databases created
+-- before this column existed need this script once. Safe to re-run.
+
+ALTER TABLE api_keys ADD COLUMN IF NOT EXISTS last_used_at TIMESTAMP WITH TIME ZONE;
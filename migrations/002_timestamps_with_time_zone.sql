@@ -0,0 +1,24 @@
+-- Converts users/wallets/transactions timestamps to TIMESTAMP WITH TIME ZONE,
+-- matching the models now that asyncpg sends timezone-aware datetimes.
+-- Existing values were written from UTC datetimes, so they are read as UTC.
+-- Columns that are already converted are skipped, so this is safe to re-run.
+
+DO $$
+DECLARE
+    col RECORD;
+BEGIN
+    FOR col IN
+        SELECT table_name, column_name
+        FROM information_schema.columns
+        WHERE table_schema = current_schema()
+          AND table_name IN ('users', 'wallets', 'transactions')
+          AND column_name IN ('created_at', 'updated_at')
+          AND data_type = 'timestamp without time zone'
+    LOOP
+        EXECUTE format(
+            'ALTER TABLE %I ALTER COLUMN %I TYPE TIMESTAMP WITH TIME ZONE USING %I AT TIME ZONE ''UTC''',
+            col.table_name, col.column_name, col.column_name
+        );
+    END LOOP;
+END
+$$;
@@ -3,10 +3,11 @@ Wallet Service with Paystack Integration
 FastAPI Application Entry Point
 """
 
+import asyncio
 import logging
 import os
 import sys
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 from datetime import datetime
 
 from fastapi import FastAPI, Request, status
@@ -18,6 +19,16 @@ from src.db.session import close_db, init_db
 from src.routes.api_key_routes import router as keys_router
 from src.routes.auth_routes import router as auth_router
 from src.routes.wallet_routes import router as wallet_router
+from src.utils.auth import (
+    flush_api_key_usage,
+    run_api_key_invalidation_listener,
+    run_api_key_usage_flusher,
+)
+from src.utils.rate_limit import (
+    PAYSTACK_WEBHOOK_IPS,
+    TRUSTED_PROXY_IPS,
+    TokenBucketMiddleware,
+)
 
 # Configure logging
 logging.basicConfig(
@@ -33,17 +44,40 @@ async def lifespan(app: FastAPI):
     """Initialize database on startup"""
     logger.info("Starting up wallet service...")
     try:
-        init_db()
+        await init_db()
         logger.info("Database initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize database: {str(e)}", exc_info=True)
         raise
 
+    if not TRUSTED_PROXY_IPS:
+        logger.warning(
+            "TRUSTED_PROXY_IPS is not set: webhook rate limiting keys on the "
+            "socket peer, so behind a reverse proxy every caller shares one "
+            "bucket and Paystack's IPs are not exempted"
+        )
+
+    usage_flusher = asyncio.create_task(run_api_key_usage_flusher())
+    invalidation_listener = asyncio.create_task(run_api_key_invalidation_listener())
+
     yield
 
     logger.info("Shutting down wallet service...")
+    # Let a flush that is mid-batch unwind before the final flush and
+    # before the engine is disposed underneath it
+    usage_flusher.cancel()
+    invalidation_listener.cancel()
+    with suppress(asyncio.CancelledError):
+        await usage_flusher
+    with suppress(asyncio.CancelledError):
+        await invalidation_listener
+    try:
+        await flush_api_key_usage()
+    except Exception as e:
+        logger.error(f"Failed to flush API key usage: {str(e)}", exc_info=True)
+
     try:
-        close_db()
+        await close_db()
         logger.info("Database connections closed")
     except Exception as e:
         logger.error(f"Error closing database: {str(e)}", exc_info=True)
@@ -70,6 +104,15 @@ app.add_middleware(
     secret_key=os.getenv("SESSION_SECRET_KEY", "super-secret-session-key"),
 )
 
+# Throttle clients that keep failing webhook signature checks, before
+# their requests reach HMAC or JSON work; Paystack's own IPs are exempt.
+# Requires TRUSTED_PROXY_IPS when running behind a reverse proxy
+app.add_middleware(
+    TokenBucketMiddleware,
+    paths=["/wallet/paystack/webhook"],
+    exempt_ips=PAYSTACK_WEBHOOK_IPS,
+)
+
 
 # Global exception handler
 @app.exception_handler(Exception)
@@ -42,9 +42,11 @@ class Transaction(Base):
     paystack_reference = Column(String, nullable=True)
     authorization_url = Column(String, nullable=True)
 
-    created_at = Column(DateTime, default=datetime.now(timezone.utc), index=True)
+    created_at = Column(
+        DateTime(timezone=True), default=datetime.now(timezone.utc), index=True
+    )
     updated_at = Column(
-        DateTime,
+        DateTime(timezone=True),
         default=datetime.now(timezone.utc),
         onupdate=datetime.now(timezone.utc),
     )
@@ -33,9 +33,9 @@ class Wallet(Base):
         default=generate_wallet_number,
     )
     balance = Column(Numeric(precision=15, scale=2), default=0.00, nullable=False)
-    created_at = Column(DateTime, default=datetime.now(timezone.utc))
+    created_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc))
     updated_at = Column(
-        DateTime,
+        DateTime(timezone=True),
         default=datetime.now(timezone.utc),
         onupdate=datetime.now(timezone.utc),
     )
@@ -5,7 +5,7 @@ API Key Management Routes
 import logging
 
 from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.db.session import get_db
 from src.routes.docs.api_key_routes_docs import (
@@ -38,10 +38,10 @@ router = APIRouter()
 @router.post(
     "/create", response_model=APIKeyResponse, responses=create_api_key_responses
 )
-def create_api_key(
+async def create_api_key(
     request: APIKeyCreate,
     current_user_data: tuple = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Create a new API key
@@ -61,7 +61,7 @@ def create_api_key(
     user, _ = current_user_data
 
     try:
-        result = api_key_service.create_api_key(
+        result = await api_key_service.create_api_key(
             db=db,
             user=user,
             name=request.name,
@@ -96,9 +96,9 @@ create_api_key._custom_success = create_api_key_custom_success
 
 
 @router.get("/list", responses=list_api_keys_responses)
-def list_api_keys(
+async def list_api_keys(
     current_user_data: tuple = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Get all API keys for the current user
@@ -107,7 +107,7 @@ def list_api_keys(
     user, _ = current_user_data
 
     try:
-        api_keys = api_key_service.list_api_keys(db=db, user=user)
+        api_keys = await api_key_service.list_api_keys(db=db, user=user)
         return success_response(
             status_code=status.HTTP_200_OK,
             message="API keys retrieved successfully",
@@ -129,10 +129,10 @@ list_api_keys._custom_success = list_api_keys_custom_success
 
 
 @router.post("/revoke/{key_id}", responses=revoke_api_key_responses)
-def revoke_api_key(
+async def revoke_api_key(
     key_id: str,
     current_user_data: tuple = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Revoke an API key
@@ -141,7 +141,7 @@ def revoke_api_key(
     user, _ = current_user_data
 
     try:
-        api_key_service.revoke_api_key(db=db, user=user, key_id=key_id)
+        await api_key_service.revoke_api_key(db=db, user=user, key_id=key_id)
         logger.info(f"API key revoked for user {user.id}: {key_id}")
         return success_response(
             status_code=status.HTTP_200_OK,
@@ -181,10 +181,10 @@ revoke_api_key._custom_errors = revoke_api_key_custom_errors
 @router.post(
     "/rollover", response_model=APIKeyResponse, responses=rollover_api_key_responses
 )
-def rollover_api_key(
+async def rollover_api_key(
     request: APIKeyRollover,
     current_user_data: tuple = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Rollover an expired API key
@@ -193,7 +193,7 @@ def rollover_api_key(
     user, _ = current_user_data
 
     try:
-        result = api_key_service.rollover_api_key(
+        result = await api_key_service.rollover_api_key(
             db=db,
             user=user,
             expired_key_id=request.expired_key_id,
@@ -6,9 +6,7 @@ Returns JSON responses with redirect URLs instead of performing redirects
 import logging
 
 from fastapi import APIRouter, Depends, Query, status
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.db.session import get_db
 from src.routes.docs.auth_routes_docs import (
     google_callback_custom_errors,
     google_callback_custom_success,
@@ -82,7 +80,6 @@ async def google_callback(
     state: str = Query(
         None, description="CSRF state parameter (optional verification)"
     ),
-    db: AsyncSession = Depends(get_db),
 ):
     """
     Exchange Google authorization code for JWT token
@@ -96,7 +93,7 @@ async def google_callback(
     ```
     """
     try:
-        token_response = auth_service.handle_google_callback(code, db)
+        token_response = await auth_service.handle_google_callback(code)
         logger.info("Google OAuth callback successful - returning JWT token")
         return token_response
 
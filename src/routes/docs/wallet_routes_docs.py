@@ -225,6 +225,24 @@ paystack_webhook_responses = {
             }
         },
     },
+    429: {
+        "description": "Too Many Requests - Repeated Signature Failures",
+        "content": {
+            "application/json": {
+                "examples": {
+                    "rate_limited": {
+                        "summary": "Rate Limited",
+                        "value": {
+                            "error": "RATE_LIMITED",
+                            "message": "Too many requests. Please retry later",
+                            "status_code": 429,
+                            "errors": {},
+                        },
+                    },
+                }
+            }
+        },
+    },
     500: {
         "description": "Internal Server Error",
         "content": {
@@ -245,7 +263,7 @@ paystack_webhook_responses = {
     },
 }
 
-paystack_webhook_custom_errors = ["401", "500"]
+paystack_webhook_custom_errors = ["401", "429", "500"]
 paystack_webhook_custom_success = {
     "status_code": 200,
     "description": "Webhook processed successfully.",
@@ -1,10 +1,10 @@
 import logging
+from typing import Optional
 
 from fastapi import APIRouter, Depends, Header, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.db.session import get_db
-from src.models.user_model import User
 from src.routes.docs.wallet_routes_docs import (
     get_balance_custom_errors,
     get_balance_custom_success,
@@ -28,6 +28,7 @@ from src.routes.docs.wallet_routes_docs import (
     transfer_funds_custom_success,
     transfer_funds_responses,
 )
+from src.schemas.auth_schemas import AuthenticatedUser
 from src.schemas.wallet_schemas import (
     DepositRequest,
     TransactionResponse,
@@ -36,6 +37,8 @@ from src.schemas.wallet_schemas import (
 from src.services.wallet_service import wallet_service
 from src.services.webhook_service import webhook_service
 from src.utils.auth import require_permission
+from src.utils.exceptions import WebhookSignatureError
+from src.utils.rate_limit import refund_rate_limit
 from src.utils.responses import error_response, success_response
 
 logger = logging.getLogger(__name__)
@@ -45,7 +48,7 @@ router = APIRouter()
 @router.post("/deposit", responses=initiate_deposit_responses)
 async def initiate_deposit(
     request: DepositRequest,
-    current_user: User = Depends(require_permission("deposit")),
+    current_user: AuthenticatedUser = Depends(require_permission("deposit")),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -53,7 +56,7 @@ async def initiate_deposit(
     Requires: JWT or API key with 'deposit' permission
     """
     try:
-        result = wallet_service.initiate_deposit(
+        result = await wallet_service.initiate_deposit(
             db=db, user=current_user, amount=request.amount
         )
 
@@ -85,7 +88,7 @@ initiate_deposit._custom_success = initiate_deposit_custom_success
 
 @router.get("/details", responses=get_wallet_details_responses)
 async def get_wallet_details(
-    current_user: User = Depends(require_permission("read")),
+    current_user: AuthenticatedUser = Depends(require_permission("read")),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -93,7 +96,7 @@ async def get_wallet_details(
     Requires: JWT or API key with 'read' permission
     """
     try:
-        wallet = wallet_service.get_or_create_wallet(db=db, user=current_user)
+        wallet = await wallet_service.get_or_create_wallet(db=db, user=current_user)
 
         return {
             "wallet_number": wallet.wallet_number,
@@ -118,10 +121,26 @@ get_wallet_details._custom_errors = get_wallet_details_custom_errors
 get_wallet_details._custom_success = get_wallet_details_custom_success
 
 
+def _paystack_signature(
+    x_paystack_signature: Optional[str] = Header(None),
+) -> Optional[bytes]:
+    """
+    Decode the hex signature header once at the edge
+    Missing gives None; malformed hex gives b"", which never verifies
+    """
+    if not x_paystack_signature:
+        return None
+
+    try:
+        return bytes.fromhex(x_paystack_signature)
+    except ValueError:
+        return b""
+
+
 @router.post("/paystack/webhook", responses=paystack_webhook_responses)
 async def paystack_webhook(
     request: Request,
-    x_paystack_signature: str = Header(None),
+    x_paystack_signature: Optional[bytes] = Depends(_paystack_signature),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -131,13 +150,16 @@ async def paystack_webhook(
     try:
         body = await request.body()
 
-        webhook_service.process_paystack_webhook(
+        await webhook_service.process_paystack_webhook(
             db=db, body=body, signature=x_paystack_signature
         )
 
         return ({"status": True},)
 
     except ValueError as e:
+        if not isinstance(e, WebhookSignatureError):
+            # Signed by Paystack, so not forged traffic: don't count it
+            refund_rate_limit(request)
         logger.warning(f"Invalid webhook signature or data: {str(e)}")
         return error_response(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -167,7 +189,7 @@ paystack_webhook._custom_success = paystack_webhook_custom_success
 @router.get("/deposit/{reference}/status", responses=get_deposit_status_responses)
 async def get_deposit_status(
     reference: str,
-    current_user: User = Depends(require_permission("read")),
+    current_user: AuthenticatedUser = Depends(require_permission("read")),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -176,7 +198,7 @@ async def get_deposit_status(
     Requires: JWT or API key with 'read' permission
     """
     try:
-        result = wallet_service.get_deposit_status(
+        result = await wallet_service.get_deposit_status(
             db=db, reference=reference, user=current_user
         )
         return (result,)
@@ -207,7 +229,7 @@ get_deposit_status._custom_success = get_deposit_status_custom_success
 
 @router.get("/balance", responses=get_balance_responses)
 async def get_balance(
-    current_user: User = Depends(require_permission("read")),
+    current_user: AuthenticatedUser = Depends(require_permission("read")),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -215,7 +237,7 @@ async def get_balance(
     Requires: JWT or API key with 'read' permission
     """
     try:
-        balance = wallet_service.get_balance(db=db, user=current_user)
+        balance = await wallet_service.get_balance(db=db, user=current_user)
         return ({"balance": balance},)
 
     except Exception as e:
@@ -236,7 +258,7 @@ get_balance._custom_success = get_balance_custom_success
 @router.post("/transfer", responses=transfer_funds_responses)
 async def transfer_funds(
     request: TransferRequest,
-    current_user: User = Depends(require_permission("transfer")),
+    current_user: AuthenticatedUser = Depends(require_permission("transfer")),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -244,7 +266,7 @@ async def transfer_funds(
     Requires: JWT or API key with 'transfer' permission
     """
     try:
-        result = wallet_service.transfer_funds(
+        result = await wallet_service.transfer_funds(
             db=db,
             sender=current_user,
             recipient_wallet_number=request.wallet_number,
@@ -286,7 +308,7 @@ transfer_funds._custom_success = transfer_funds_custom_success
 
 @router.get("/transactions", responses=get_transactions_responses)
 async def get_transactions(
-    current_user: User = Depends(require_permission("read")),
+    current_user: AuthenticatedUser = Depends(require_permission("read")),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -294,7 +316,7 @@ async def get_transactions(
     Requires: JWT or API key with 'read' permission
     """
     try:
-        transactions = wallet_service.get_transactions(db=db, user=current_user)
+        transactions = await wallet_service.get_transactions(db=db, user=current_user)
         data_list = [TransactionResponse.from_orm(t) for t in transactions]
 
         return ({"transactions": data_list, "count": len(data_list)},)
@@ -2,8 +2,9 @@
 Pydantic Schemas for Request/Response Validation
 """
 
-from datetime import datetime
-from typing import List, Optional
+from datetime import datetime, timezone
+from functools import cached_property
+from typing import FrozenSet, List, Optional
 
 from pydantic import BaseModel, ConfigDict, Field, field_validator
 
@@ -52,3 +53,27 @@ class APIKeyInfo(BaseModel):
     created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class AuthenticatedAPIKey(BaseModel):
+    """Immutable snapshot of the API key used to authenticate a request"""
+
+    id: str
+    user_id: str
+    permissions: FrozenSet[str]
+    is_active: bool
+    is_revoked: bool
+    expires_at: datetime
+
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+    @field_validator("expires_at")
+    def normalize_expires_at(cls, v):
+        if v.tzinfo is None:
+            return v.replace(tzinfo=timezone.utc)
+        return v.astimezone(timezone.utc)
+
+    @cached_property
+    def expires_at_ts(self) -> float:
+        """POSIX expiry, for comparing against time.time()"""
+        return self.expires_at.timestamp()
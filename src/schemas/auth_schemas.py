@@ -2,7 +2,9 @@
 Authentication Schemas
 """
 
-from pydantic import BaseModel, Field
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class TokenResponse(BaseModel):
@@ -29,3 +31,14 @@ class UserTestResponse(BaseModel):
 
     message: str
     user: dict
+
+
+class AuthenticatedUser(BaseModel):
+    """Immutable snapshot of the authenticated user, safe to cache across requests"""
+
+    id: str
+    email: str
+    name: Optional[str] = None
+    is_active: bool = True
+
+    model_config = ConfigDict(from_attributes=True, frozen=True)
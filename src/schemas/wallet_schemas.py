@@ -50,12 +50,14 @@ class DepositStatusResponse(BaseModel):
 
 
 class PaystackWebhookData(BaseModel):
-    reference: str
-    amount: int
-    status: str
+    # Optional so that events we ignore still parse; the webhook service
+    # enforces what a charge.success needs
+    reference: Optional[str] = None
+    amount: Optional[int] = None
+    status: Optional[str] = None
     paid_at: Optional[str] = None
 
 
 class PaystackWebhook(BaseModel):
-    event: str
-    data: PaystackWebhookData
+    event: Optional[str] = None
+    data: PaystackWebhookData = PaystackWebhookData()
@@ -8,11 +8,12 @@ from typing import List
 
 from sqlalchemy import and_, func, select
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.models.api_key_model import APIKey
-from src.models.user_model import User
 from src.schemas.api_keys_schemas import APIKeyResponse
+from src.schemas.auth_schemas import AuthenticatedUser
+from src.utils.auth import invalidate_api_key, publish_api_key_invalidation
 from src.utils.security import generate_api_key, hash_api_key, parse_expiry
 
 
@@ -22,10 +23,10 @@ class APIKeyService:
     MAX_ACTIVE_KEYS = 5
     MAX_RETRY_ATTEMPTS = 5
 
-    def create_api_key(
+    async def create_api_key(
         self,
-        db: Session,
-        user: User,
+        db: AsyncSession,
+        user: AuthenticatedUser,
         name: str,
         permissions: List[str],
         expiry: str,
@@ -35,22 +36,19 @@ class APIKeyService:
         if expires_at.tzinfo is None:
             expires_at = expires_at.replace(tzinfo=timezone.utc)
 
-        active_keys = (
-            db.execute(
-                select(APIKey)
-                .where(
-                    and_(
-                        APIKey.user_id == user.id,
-                        APIKey.is_active,
-                        APIKey.is_revoked == False,  # noqa: E712
-                        APIKey.expires_at > datetime.now(timezone.utc),
-                    )
+        result = await db.execute(
+            select(APIKey)
+            .where(
+                and_(
+                    APIKey.user_id == user.id,
+                    APIKey.is_active,
+                    APIKey.is_revoked == False,  # noqa: E712
+                    APIKey.expires_at > datetime.now(timezone.utc),
                 )
-                .with_for_update()
             )
-            .scalars()
-            .all()
+            .with_for_update()
         )
+        active_keys = result.scalars().all()
 
         active_count = len(active_keys)
 
@@ -73,26 +71,30 @@ class APIKeyService:
             )
             db.add(api_key_record)
             try:
-                db.flush()
+                await db.flush()
                 break
             except IntegrityError:
-                db.rollback()
+                await db.rollback()
                 if attempt == self.MAX_RETRY_ATTEMPTS - 1:
                     raise ValueError(
                         "Failed to generate unique API key after multiple attempts"
                     )
 
-        db.commit()
+        await db.commit()
         return APIKeyResponse(api_key=api_key, expires_at=expires_at)
 
-    def rollover_api_key(
-        self, db: Session, user: User, expired_key_id: str, new_expiry: str
+    async def rollover_api_key(
+        self,
+        db: AsyncSession,
+        user: AuthenticatedUser,
+        expired_key_id: str,
+        new_expiry: str,
     ) -> APIKeyResponse:
         new_expires_at = parse_expiry(new_expiry)
         if new_expires_at.tzinfo is None:
             new_expires_at = new_expires_at.replace(tzinfo=timezone.utc)
 
-        result = db.execute(
+        result = await db.execute(
             select(APIKey)
             .where(and_(APIKey.id == expired_key_id, APIKey.user_id == user.id))
             .with_for_update()
@@ -108,7 +110,7 @@ class APIKeyService:
         if expired_key.is_revoked:
             raise ValueError("API key has already been revoked")
 
-        result = db.execute(
+        result = await db.execute(
             select(func.count(APIKey.id))
             .where(
                 and_(
@@ -127,6 +129,12 @@ class APIKeyService:
                 f"Maximum of {self.MAX_ACTIVE_KEYS} active API keys allowed per user"
             )
 
+        # A failed attempt rolls back and expires expired_key, and async
+        # sessions cannot lazy-load, so read what the new key needs up front
+        key_name = expired_key.name
+        key_permissions = expired_key.permissions
+        expired_key_hash = expired_key.key_hash
+
         for attempt in range(self.MAX_RETRY_ATTEMPTS):
             new_api_key = generate_api_key()
             new_key_hash = hash_api_key(new_api_key)
@@ -134,32 +142,36 @@ class APIKeyService:
 
             new_api_key_record = APIKey(
                 user_id=user.id,
-                name=expired_key.name,
+                name=key_name,
                 key_hash=new_key_hash,
                 key_prefix=new_key_prefix,
-                permissions=expired_key.permissions,
+                permissions=key_permissions,
                 expires_at=new_expires_at,
             )
 
             db.add(new_api_key_record)
 
             try:
-                db.flush()
+                await db.flush()
                 break
             except IntegrityError:
-                db.rollback()
+                await db.rollback()
                 if attempt == self.MAX_RETRY_ATTEMPTS - 1:
                     raise ValueError(
                         "Failed to generate unique API key after multiple attempts"
                     )
 
         expired_key.is_revoked = True
-        db.commit()
+        await publish_api_key_invalidation(db, expired_key_hash)
+        await db.commit()
+        invalidate_api_key(expired_key_hash)
 
         return APIKeyResponse(api_key=new_api_key, expires_at=new_expires_at)
 
-    def revoke_api_key(self, db: Session, user: User, key_id: str) -> bool:
-        result = db.execute(
+    async def revoke_api_key(
+        self, db: AsyncSession, user: AuthenticatedUser, key_id: str
+    ) -> bool:
+        result = await db.execute(
             select(APIKey)
             .where(and_(APIKey.id == key_id, APIKey.user_id == user.id))
             .with_for_update()
@@ -173,12 +185,14 @@ class APIKeyService:
             raise ValueError("API key is already revoked")
 
         api_key.is_revoked = True
-        db.commit()
+        await publish_api_key_invalidation(db, api_key.key_hash)
+        await db.commit()
+        invalidate_api_key(api_key.key_hash)
 
         return True
 
-    def _count_active_keys(self, db: Session, user_id: str) -> int:
-        result = db.execute(
+    async def _count_active_keys(self, db: AsyncSession, user_id: str) -> int:
+        result = await db.execute(
             select(func.count(APIKey.id)).where(
                 and_(
                     APIKey.user_id == user_id,
@@ -190,14 +204,14 @@ class APIKeyService:
         )
         return result.scalar()
 
-    def _get_api_key(self, db: Session, key_id: str, user_id: str) -> APIKey:
-        result = db.execute(
+    async def _get_api_key(self, db: AsyncSession, key_id: str, user_id: str) -> APIKey:
+        result = await db.execute(
             select(APIKey).where(and_(APIKey.id == key_id, APIKey.user_id == user_id))
         )
         return result.scalar_one_or_none()
 
-    def list_api_keys(self, db: Session, user: User):
-        result = db.execute(
+    async def list_api_keys(self, db: AsyncSession, user: AuthenticatedUser):
+        result = await db.execute(
             select(APIKey)
             .where(APIKey.user_id == user.id)
             .order_by(APIKey.created_at.desc())
@@ -3,19 +3,23 @@ Authentication Service - Google OAuth Business Logic
 Refactored to use httpx and return redirect URLs instead of performing redirects
 """
 
+import asyncio
 import logging
 import os
 import secrets
+from typing import Dict
 from urllib.parse import urlencode
 
 import httpx
 from dotenv import load_dotenv
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.db.session import SessionLocal
 from src.models.user_model import User
 from src.models.wallet_model import Wallet
 from src.schemas.auth_schemas import TokenResponse
+from src.utils.auth import invalidate_user
 from src.utils.security import create_jwt_token
 
 load_dotenv()
@@ -36,6 +40,9 @@ class AuthService:
         self.google_token_url = "https://oauth2.googleapis.com/token"
         self.google_userinfo_url = "https://www.googleapis.com/oauth2/v2/userinfo"
 
+        # Callbacks currently being processed, keyed by authorization code
+        self._inflight: Dict[str, asyncio.Task] = {}
+
         if self.google_client_id and self.google_client_secret:
             logger.info("Google OAuth configured successfully")
         else:
@@ -66,7 +73,7 @@ class AuthService:
 
         return {"authorization_url": authorization_url, "state": state}
 
-    def exchange_code_for_token(self, code: str) -> dict:
+    async def exchange_code_for_token(self, code: str) -> dict:
         if not self.google_client_id or not self.google_client_secret:
             raise ValueError("Google OAuth not configured")
 
@@ -79,11 +86,12 @@ class AuthService:
         }
 
         try:
-            response = httpx.post(
-                self.google_token_url,
-                data=token_data,
-                headers={"Content-Type": "application/x-www-form-urlencoded"},
-            )
+            async with httpx.AsyncClient() as client:
+                response = await client.post(
+                    self.google_token_url,
+                    data=token_data,
+                    headers={"Content-Type": "application/x-www-form-urlencoded"},
+                )
             response.raise_for_status()
 
             return response.json()
@@ -91,26 +99,48 @@ class AuthService:
             logger.error(f"Failed to exchange code for token: {str(e)}")
             raise ValueError(f"Failed to exchange authorization code: {str(e)}")
 
-    def get_user_info(self, access_token: str) -> dict:
+    async def get_user_info(self, access_token: str) -> dict:
         try:
-            response = httpx.get(
-                self.google_userinfo_url,
-                headers={"Authorization": f"Bearer {access_token}"},
-            )
+            async with httpx.AsyncClient() as client:
+                response = await client.get(
+                    self.google_userinfo_url,
+                    headers={"Authorization": f"Bearer {access_token}"},
+                )
             response.raise_for_status()
             return response.json()
         except httpx.HTTPError as e:
             logger.error(f"Failed to get user info: {str(e)}")
             raise ValueError(f"Failed to get user information: {str(e)}")
 
-    def handle_google_callback(self, code: str, db: Session) -> TokenResponse:
-        token_data = self.exchange_code_for_token(code)
+    async def handle_google_callback(self, code: str) -> TokenResponse:
+        """
+        Single-flight wrapper around the callback flow.
+        Google authorization codes are single-use, so concurrent callers
+        presenting the same code wait for the first caller's result instead
+        of racing it to the token endpoint.
+        The shared task opens its own session and every caller awaits it
+        shielded, so no single request ending or disconnecting can cancel
+        it or close the session underneath it.
+        """
+        task = self._inflight.get(code)
+
+        if task is not None:
+            logger.info("Joining in-flight Google OAuth callback")
+        else:
+            task = asyncio.ensure_future(self._handle_google_callback(code))
+            self._inflight[code] = task
+            task.add_done_callback(lambda _: self._inflight.pop(code, None))
+
+        return await asyncio.shield(task)
+
+    async def _handle_google_callback(self, code: str) -> TokenResponse:
+        token_data = await self.exchange_code_for_token(code)
         access_token = token_data.get("access_token")
 
         if not access_token:
             raise ValueError("Failed to get access token from Google")
 
-        user_info = self.get_user_info(access_token)
+        user_info = await self.get_user_info(access_token)
         logger.info(f"Google user info: {user_info}")
 
         email = user_info.get("email")
@@ -123,9 +153,10 @@ class AuthService:
 
         logger.info(f"Google OAuth callback for email: {email}")
 
-        user = self._get_or_create_user(
-            db=db, email=email, google_id=google_id, name=name, picture=picture
-        )
+        async with SessionLocal() as db:
+            user = await self._get_or_create_user(
+                db=db, email=email, google_id=google_id, name=name, picture=picture
+            )
 
         jwt_token = create_jwt_token(user.id, user.email)
 
@@ -133,19 +164,19 @@ class AuthService:
 
         return TokenResponse(access_token=jwt_token, token_type="bearer")
 
-    def _get_or_create_user(
+    async def _get_or_create_user(
         self,
-        db: Session,
+        db: AsyncSession,
         email: str,
         google_id: str,
         name: str = None,
         picture: str = None,
     ) -> User:
-        result = db.execute(select(User).where(User.google_id == google_id))
+        result = await db.execute(select(User).where(User.google_id == google_id))
         user = result.scalar_one_or_none()
 
         if not user:
-            result = db.execute(select(User).where(User.email == email))
+            result = await db.execute(select(User).where(User.email == email))
             user = result.scalar_one_or_none()
 
             if user:
@@ -154,7 +185,8 @@ class AuthService:
                     user.name = name
                 if picture:
                     user.picture = picture
-                db.commit()
+                await db.commit()
+                invalidate_user(user.id)
                 logger.info(f"Updated existing user with Google ID: {email}")
                 return user
 
@@ -169,12 +201,12 @@ class AuthService:
             picture=picture,
         )
         db.add(user)
-        db.flush()
+        await db.flush()
 
         wallet = Wallet(user_id=user.id)
         db.add(wallet)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
 
         logger.info(f"Created new user: {email}")
 
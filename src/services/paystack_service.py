@@ -34,7 +34,7 @@ class PaystackService:
             "Content-Type": "application/json",
         }
 
-    def initialize_transaction(
+    async def initialize_transaction(
         self, email: str, amount: Decimal, reference: str, callback_url: str = None
     ) -> Dict[str, Any]:
         if not self.secret_key:
@@ -52,12 +52,12 @@ class PaystackService:
             payload["callback_url"] = callback_url
 
         try:
-            response = httpx.post(
-                f"{self.base_url}/transaction/initialize",
-                json=payload,
-                headers=self._get_headers(),
-                timeout=30.0,
-            )
+            async with httpx.AsyncClient(timeout=30.0) as client:
+                response = await client.post(
+                    f"{self.base_url}/transaction/initialize",
+                    json=payload,
+                    headers=self._get_headers(),
+                )
 
             response.raise_for_status()
             data = response.json()
@@ -75,16 +75,16 @@ class PaystackService:
             logger.error(f"Paystack error: {str(e)}", exc_info=True)
             raise Exception("Failed to initialize payment")
 
-    def verify_transaction(self, reference: str) -> Dict[str, Any]:
+    async def verify_transaction(self, reference: str) -> Dict[str, Any]:
         if not self.secret_key:
             raise Exception("Paystack secret key not configured")
 
         try:
-            response = httpx.get(
-                f"{self.base_url}/transaction/verify/{reference}",
-                headers=self._get_headers(),
-                timeout=30.0,
-            )
+            async with httpx.AsyncClient(timeout=30.0) as client:
+                response = await client.get(
+                    f"{self.base_url}/transaction/verify/{reference}",
+                    headers=self._get_headers(),
+                )
 
             response.raise_for_status()
             data = response.json()
@@ -2,16 +2,18 @@
 Wallet Service - Business Logic for Wallet Operations
 """
 
-from datetime import datetime, timezone
 from decimal import Decimal
 from typing import List
 
-from sqlalchemy import and_, select
-from sqlalchemy.orm import Session
+from pydantic import ValidationError
+from sqlalchemy import bindparam, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.db.session import run_serializable
 from src.models.transaction_model import Transaction, TransactionStatus, TransactionType
-from src.models.user_model import User
 from src.models.wallet_model import Wallet
+from src.schemas.auth_schemas import AuthenticatedUser
 from src.schemas.wallet_schemas import (
     DepositResponse,
     DepositStatusResponse,
@@ -20,23 +22,41 @@ from src.schemas.wallet_schemas import (
 from src.services.paystack_service import paystack_service
 from src.utils.security import generate_transaction_reference
 
+# Wallet lookup behind every balance/details read, and the per-user deposit
+# lookup behind status polling
+_WALLET_BY_USER = select(Wallet).where(Wallet.user_id == bindparam("user_id"))
+_DEPOSIT_BY_REFERENCE = select(Transaction).where(
+    Transaction.reference == bindparam("reference"),
+    Transaction.user_id == bindparam("user_id"),
+    Transaction.type == TransactionType.DEPOSIT,
+)
+
 
 class WalletService:
     """Service for wallet operations"""
 
-    def get_or_create_wallet(self, db: Session, user: User) -> Wallet:
-        result = db.execute(select(Wallet).where(Wallet.user_id == user.id))
-        wallet = result.scalar_one_or_none()
+    async def get_or_create_wallet(
+        self, db: AsyncSession, user: AuthenticatedUser
+    ) -> Wallet:
+        wallet = await db.scalar(_WALLET_BY_USER, {"user_id": user.id})
 
         if not wallet:
-            wallet = Wallet(user_id=user.id)
-            db.add(wallet)
-            db.flush()
+            # Upsert so a concurrent request creating the same wallet cannot
+            # fail on the unique user_id; RETURNING yields the row either way
+            stmt = insert(Wallet).values(user_id=user.id)
+            wallet = await db.scalar(
+                stmt.on_conflict_do_update(
+                    index_elements=[Wallet.user_id],
+                    set_={"user_id": stmt.excluded.user_id},
+                )
+                .returning(Wallet)
+                .execution_options(populate_existing=True)
+            )
 
         return wallet
 
-    def initiate_deposit(
-        self, db: Session, user: User, amount: Decimal
+    async def initiate_deposit(
+        self, db: AsyncSession, user: AuthenticatedUser, amount: Decimal
     ) -> DepositResponse:
         if amount <= 0:
             raise ValueError("Amount must be greater than zero")
@@ -52,56 +72,89 @@ class WalletService:
             paystack_reference=reference,
         )
         db.add(transaction)
-        db.flush()
+        await db.flush()
 
-        paystack_data = paystack_service.initialize_transaction(
+        paystack_data = await paystack_service.initialize_transaction(
             email=user.email, amount=amount, reference=reference
         )
 
-        transaction.authorization_url = paystack_data["authorization_url"]
-        db.commit()
+        # authorization_url comes from Paystack, so it is validated (and the
+        # pending transaction rolled back) rather than trusted
+        try:
+            response = DepositResponse(
+                reference=reference,
+                authorization_url=paystack_data.get("authorization_url"),
+            )
+        except ValidationError:
+            await db.rollback()
+            raise Exception("Invalid response from payment service")
 
-        return DepositResponse(
-            reference=reference, authorization_url=paystack_data["authorization_url"]
-        )
+        transaction.authorization_url = response.authorization_url
+        await db.commit()
+
+        return response
 
-    def get_deposit_status(
-        self, db: Session, reference: str, user: User
+    async def get_deposit_status(
+        self, db: AsyncSession, reference: str, user: AuthenticatedUser
     ) -> DepositStatusResponse:
-        result = db.execute(
-            select(Transaction).where(
-                and_(
-                    Transaction.reference == reference,
-                    Transaction.user_id == user.id,
-                    Transaction.type == TransactionType.DEPOSIT,
-                )
-            )
+        transaction = await db.scalar(
+            _DEPOSIT_BY_REFERENCE, {"reference": reference, "user_id": user.id}
         )
-        transaction = result.scalar_one_or_none()
 
         if not transaction:
             raise LookupError(f"Transaction not found: {reference}")
 
-        return DepositStatusResponse(
+        return DepositStatusResponse.model_construct(
             reference=transaction.reference,
             status=transaction.status.value,
             amount=transaction.amount,
         )
 
-    def transfer_funds(
+    async def transfer_funds(
         self,
-        db: Session,
-        sender: User,
+        db: AsyncSession,
+        sender: AuthenticatedUser,
         recipient_wallet_number: str,
         amount: Decimal,
     ) -> TransferResponse:
         if amount <= 0:
             raise ValueError("Transfer amount must be greater than zero")
 
-        sender_wallet_result = db.execute(
-            select(Wallet).where(Wallet.user_id == sender.id)
+        return await run_serializable(
+            db,
+            lambda: self._transfer_funds(db, sender, recipient_wallet_number, amount),
+        )
+
+    async def _transfer_funds(
+        self,
+        db: AsyncSession,
+        sender: AuthenticatedUser,
+        recipient_wallet_number: str,
+        amount: Decimal,
+    ) -> TransferResponse:
+        # Lock both wallets in ascending id order so that concurrent A->B and
+        # B->A transfers queue behind each other instead of deadlocking
+        locked_wallets = (
+            await db.execute(
+                select(Wallet.id, Wallet.user_id, Wallet.wallet_number, Wallet.balance)
+                .where(
+                    or_(
+                        Wallet.user_id == sender.id,
+                        Wallet.wallet_number == recipient_wallet_number,
+                    )
+                )
+                .order_by(Wallet.id)
+                .with_for_update()
+            )
+        ).all()
+
+        sender_wallet = next(
+            (w for w in locked_wallets if w.user_id == sender.id), None
+        )
+        recipient_wallet = next(
+            (w for w in locked_wallets if w.wallet_number == recipient_wallet_number),
+            None,
         )
-        sender_wallet = sender_wallet_result.scalar_one_or_none()
 
         if not sender_wallet:
             raise ValueError("Your wallet was not found. Please contact support.")
@@ -111,11 +164,6 @@ class WalletService:
                 f"Insufficient balance. Available: {sender_wallet.balance}, Required: {amount}"
             )
 
-        recipient_wallet_result = db.execute(
-            select(Wallet).where(Wallet.wallet_number == recipient_wallet_number)
-        )
-        recipient_wallet = recipient_wallet_result.scalar_one_or_none()
-
         if not recipient_wallet:
             raise LookupError(
                 f"Recipient wallet '{recipient_wallet_number}' not found. Please verify the wallet number."
@@ -124,13 +172,18 @@ class WalletService:
         if sender_wallet.id == recipient_wallet.id:
             raise ValueError("Cannot transfer to your own wallet")
 
-        reference = generate_transaction_reference()
-
-        sender_wallet.balance -= amount
-        sender_wallet.updated_at = datetime.now(timezone.utc)
+        await db.execute(
+            update(Wallet)
+            .where(Wallet.id == sender_wallet.id)
+            .values(balance=Wallet.balance - amount, updated_at=func.now())
+        )
+        await db.execute(
+            update(Wallet)
+            .where(Wallet.id == recipient_wallet.id)
+            .values(balance=Wallet.balance + amount, updated_at=func.now())
+        )
 
-        recipient_wallet.balance += amount
-        recipient_wallet.updated_at = datetime.now(timezone.utc)
+        reference = generate_transaction_reference()
 
         transaction = Transaction(
             user_id=sender.id,
@@ -143,16 +196,20 @@ class WalletService:
         )
         db.add(transaction)
 
-        db.commit()
+        await db.commit()
 
-        return TransferResponse(status="success", message="Transfer completed")
+        return TransferResponse.model_construct(
+            status="success", message="Transfer completed"
+        )
 
-    def get_balance(self, db: Session, user: User) -> Decimal:
-        wallet = self.get_or_create_wallet(db, user)
+    async def get_balance(self, db: AsyncSession, user: AuthenticatedUser) -> Decimal:
+        wallet = await self.get_or_create_wallet(db, user)
         return wallet.balance
 
-    def get_transactions(self, db: Session, user: User) -> List[Transaction]:
-        result = db.execute(
+    async def get_transactions(
+        self, db: AsyncSession, user: AuthenticatedUser
+    ) -> List[Transaction]:
+        result = await db.execute(
             select(Transaction)
             .where(Transaction.user_id == user.id)
             .order_by(Transaction.created_at.desc())
@@ -2,111 +2,175 @@
 Webhook Service - Paystack Webhook Processing
 """
 
-import json
 import logging
-from datetime import datetime, timezone
+import os
 from decimal import Decimal
+from typing import Optional
 
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.db.session import run_serializable
 from src.models.transaction_model import Transaction, TransactionStatus
 from src.models.wallet_model import Wallet
+from src.schemas.wallet_schemas import PaystackWebhook
+from src.utils.cache import TTLCache
+from src.utils.exceptions import WalletNotFoundError, WebhookSignatureError
 from src.utils.security import verify_paystack_signature
 
 logger = logging.getLogger(__name__)
 
+CHARGE_SUCCESS_MARKER = b"charge.success"
+
+PROCESSED_REFERENCE_CACHE_TTL_SECONDS = int(
+    os.getenv("PROCESSED_REFERENCE_CACHE_TTL_SECONDS", "3600")
+)
+PROCESSED_REFERENCE_CACHE_MAXSIZE = 100_000
+
+# reference -> True once credited; SUCCESS is final, so replays can be
+# answered without touching the database
+_processed_references = TTLCache(
+    maxsize=PROCESSED_REFERENCE_CACHE_MAXSIZE,
+    ttl=PROCESSED_REFERENCE_CACHE_TTL_SECONDS,
+)
+
+_TRANSACTIONS = Transaction.__table__
+_WALLETS = Wallet.__table__
+
 
 class WebhookService:
     """Service for processing Paystack webhooks"""
 
-    def process_paystack_webhook(
-        self, db: Session, body: bytes, signature: str
+    async def process_paystack_webhook(
+        self, db: AsyncSession, body: bytes, signature: Optional[bytes]
     ) -> bool:
-        if not signature:
-            raise ValueError("Missing Paystack signature")
+        if signature is None:
+            raise WebhookSignatureError("Missing Paystack signature")
 
         if not verify_paystack_signature(body, signature):
-            raise ValueError("Invalid Paystack signature")
+            raise WebhookSignatureError("Invalid Paystack signature")
 
-        webhook_data = json.loads(body.decode("utf-8"))
+        # Cheap pre-filter: a body that never mentions the one event we act
+        # on cannot be a charge.success, so skip decoding it at all
+        if CHARGE_SUCCESS_MARKER not in body:
+            logger.info("Ignoring webhook event: not charge.success")
+            return False
+
+        # Parsed straight from the raw bytes into just the fields we use;
+        # everything else in the payload is skipped rather than materialised
+        webhook = PaystackWebhook.model_validate_json(body)
 
-        event = webhook_data.get("event")
+        event = webhook.event
         if event != "charge.success":
             logger.info(f"Ignoring webhook event: {event}")
             return False
 
-        data = webhook_data.get("data", {})
-        reference = data.get("reference")
-        amount_in_kobo = data.get("amount")
-        paystack_status = data.get("status")
+        reference = webhook.data.reference
+        amount_in_kobo = webhook.data.amount
+        paystack_status = webhook.data.status
 
         if not reference or not amount_in_kobo:
             raise ValueError("Missing required webhook data")
 
-        processed = self._process_deposit(
-            db=db,
-            reference=reference,
-            amount_in_kobo=amount_in_kobo,
-            paystack_status=paystack_status,
+        if _processed_references.get(reference):
+            logger.info(f"Transaction already processed: {reference}")
+            return False
+
+        processed = await run_serializable(
+            db,
+            lambda: self._process_deposit(
+                db=db,
+                reference=reference,
+                amount_in_kobo=amount_in_kobo,
+                paystack_status=paystack_status,
+            ),
         )
 
         return processed
 
-    def _process_deposit(
+    async def _process_deposit(
         self,
-        db: Session,
+        db: AsyncSession,
         reference: str,
         amount_in_kobo: int,
         paystack_status: str,
     ) -> bool:
-        result = db.execute(
-            select(Transaction).where(Transaction.reference == reference)
+        amount = Decimal(amount_in_kobo).scaleb(-2)
+
+        if paystack_status == "success":
+            # Claim the transaction and credit its wallet in one statement, so
+            # two concurrent deliveries cannot both see it as uncredited and
+            # a success costs a single round trip. Core tables are used since
+            # ORM-enabled UPDATEs do not compose into a data-modifying CTE
+            claimed = (
+                update(_TRANSACTIONS)
+                .where(
+                    _TRANSACTIONS.c.reference == reference,
+                    _TRANSACTIONS.c.status != TransactionStatus.SUCCESS,
+                    _TRANSACTIONS.c.amount == amount,
+                )
+                .values(status=TransactionStatus.SUCCESS, updated_at=func.now())
+                .returning(_TRANSACTIONS.c.user_id)
+                .cte("claimed")
+            )
+            credited = (
+                await db.execute(
+                    update(_WALLETS)
+                    .where(_WALLETS.c.user_id == claimed.c.user_id)
+                    .values(balance=_WALLETS.c.balance + amount, updated_at=func.now())
+                    .returning(_WALLETS.c.user_id)
+                )
+            ).one_or_none()
+
+            if credited:
+                await db.commit()
+                _processed_references.set(reference, True)
+
+                logger.info(
+                    f"Successfully credited wallet for transaction {reference}: "
+                    f"User {credited.user_id}, Amount {amount}"
+                )
+                return True
+
+            # Undo any claim whose wallet was missing before inspecting it
+            await db.rollback()
+
+        # Nothing was claimed: work out why
+        transaction = await db.scalar(
+            select(Transaction)
+            .where(Transaction.reference == reference)
+            .with_for_update()
         )
-        transaction = result.scalar_one_or_none()
 
         if not transaction:
             raise LookupError(f"Transaction not found: {reference}")
 
         if transaction.status == TransactionStatus.SUCCESS:
+            _processed_references.set(reference, True)
             logger.info(f"Transaction already processed: {reference}")
             return False
 
-        amount = Decimal(amount_in_kobo) / 100
+        if paystack_status == "success" and amount == transaction.amount:
+            # The charge was paid and matches, so the claim only failed for
+            # want of a wallet. Leave it uncredited and answer with an error
+            # so Paystack redelivers instead of it being marked FAILED
+            raise WalletNotFoundError(
+                f"Wallet not found for user {transaction.user_id} "
+                f"crediting transaction {reference}"
+            )
+
+        transaction.status = TransactionStatus.FAILED
+        await db.commit()
 
         if amount != transaction.amount:
-            transaction.status = TransactionStatus.FAILED
-            db.commit()
             raise ValueError(
                 f"Amount mismatch for {reference}: expected {transaction.amount}, got {amount}"
             )
 
-        if paystack_status == "success":
-            transaction.status = TransactionStatus.SUCCESS
-
-            wallet_result = db.execute(
-                select(Wallet).where(Wallet.user_id == transaction.user_id)
-            )
-            wallet = wallet_result.scalar_one()
-
-            wallet.balance += amount
-            wallet.updated_at = datetime.now(timezone.utc)
-
-            db.commit()
-
-            logger.info(
-                f"Successfully credited wallet for transaction {reference}: "
-                f"User {transaction.user_id}, Amount {amount}"
-            )
-            return True
-        else:
-            transaction.status = TransactionStatus.FAILED
-            db.commit()
-
-            logger.warning(
-                f"Transaction failed from Paystack: {reference}, Status: {paystack_status}"
-            )
-            return False
+        logger.warning(
+            f"Transaction failed from Paystack: {reference}, Status: {paystack_status}"
+        )
+        return False
 
 
 webhook_service = WebhookService()
@@ -3,22 +3,80 @@ Authentication Dependencies for FastAPI
 Supports both JWT tokens and API keys with Swagger UI integration
 """
 
+import asyncio
 import logging
+import os
+import time
 from datetime import datetime, timezone
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
 
+import asyncpg
 from fastapi import Depends, HTTPException, status
 from fastapi.security import APIKeyHeader, HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.db.session import get_db
+from src.db.session import DATABASE_URL, engine, get_db
 from src.models.api_key_model import APIKey
 from src.models.user_model import User
-from src.utils.security import decode_jwt_token, hash_api_key
+from src.schemas.api_keys_schemas import AuthenticatedAPIKey
+from src.schemas.auth_schemas import AuthenticatedUser
+from src.utils.cache import TTLCache
+from src.utils.security import API_KEY_PREFIX, decode_jwt_token, hash_api_key
 
 logger = logging.getLogger(__name__)
 
+API_KEY_CACHE_TTL_SECONDS = int(os.getenv("API_KEY_CACHE_TTL_SECONDS", "30"))
+API_KEY_CACHE_MAXSIZE = 10_000
+
+# key_hash -> (AuthenticatedAPIKey, AuthenticatedUser)
+_api_key_cache = TTLCache(maxsize=API_KEY_CACHE_MAXSIZE, ttl=API_KEY_CACHE_TTL_SECONDS)
+
+USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+USER_CACHE_MAXSIZE = 10_000
+
+# user_id -> AuthenticatedUser
+_user_cache = TTLCache(maxsize=USER_CACHE_MAXSIZE, ttl=USER_CACHE_TTL_SECONDS)
+
+API_KEY_USAGE_FLUSH_INTERVAL_SECONDS = int(
+    os.getenv("API_KEY_USAGE_FLUSH_INTERVAL_SECONDS", "10")
+)
+
+# Postgres NOTIFY channel carrying key hashes whose cache entries every
+# worker must drop; see run_api_key_invalidation_listener
+API_KEY_INVALIDATION_CHANNEL = "api_key_invalidated"
+API_KEY_INVALIDATION_RECONNECT_SECONDS = 5
+
+# api_key.id -> POSIX time of latest use not yet written to last_used_at
+_pending_api_key_usage: Dict[str, float] = {}
+
+# Cache-miss lookups for request authentication, plus the batched
+# last_used_at write. They select only the columns the snapshots need
+_USER_BY_ID = select(User.id, User.email, User.name, User.is_active).where(
+    User.id == bindparam("user_id")
+)
+_API_KEY_WITH_USER = (
+    select(
+        APIKey.id,
+        APIKey.user_id,
+        APIKey.permissions,
+        APIKey.is_active,
+        APIKey.is_revoked,
+        APIKey.expires_at,
+        User.id.label("owner_id"),
+        User.email.label("owner_email"),
+        User.name.label("owner_name"),
+        User.is_active.label("owner_is_active"),
+    )
+    .outerjoin(User, User.id == APIKey.user_id)
+    .where(APIKey.key_hash == bindparam("key_hash"))
+)
+_TOUCH_API_KEYS = (
+    update(APIKey.__table__)
+    .where(APIKey.__table__.c.id == bindparam("api_key_id"))
+    .values(last_used_at=bindparam("used_at"))
+)
+
 
 bearer_scheme = HTTPBearer(
     auto_error=False,
@@ -30,19 +88,12 @@ api_key_scheme = APIKeyHeader(
     name="x-api-key",
     auto_error=False,
     scheme_name="API Key",
-    description="Enter your API key (format: sk_live_...)",
+    description=f"Enter your API key (format: {API_KEY_PREFIX}...)",
 )
 
 
-def get_current_user_from_jwt(
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
-    db: Session = Depends(get_db),
-) -> Optional[User]:
+async def _get_user_from_jwt(token: str, db: AsyncSession) -> AuthenticatedUser:
     """Get current user from JWT token"""
-    if not credentials:
-        return None
-
-    token = credentials.credentials
     payload = decode_jwt_token(token)
 
     if not payload:
@@ -52,8 +103,7 @@ def get_current_user_from_jwt(
         )
 
     user_id = payload.get("user_id")
-    result = db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
+    user = await _load_user(db, user_id)
 
     if not user:
         raise HTTPException(
@@ -67,35 +117,181 @@ def get_current_user_from_jwt(
             detail="User account is inactive",
         )
 
-    logger.debug(f"Authenticated user {user.id} via JWT")
+    logger.debug("Authenticated user %s via JWT", user.id)
     return user
 
 
-def get_current_user_from_api_key(
-    api_key_value: Optional[str] = Depends(api_key_scheme),
-    db: Session = Depends(get_db),
-) -> Tuple[Optional[User], Optional[APIKey]]:
-    """Get current user from API key"""
-    if not api_key_value:
-        return None, None
+def invalidate_user(user_id: str) -> None:
+    """Drop a cached user so profile changes take effect immediately"""
+    _user_cache.pop(user_id)
+
+
+async def _load_user(db: AsyncSession, user_id: str) -> Optional[AuthenticatedUser]:
+    """Resolve a user by id, served from cache when warm"""
+    if not user_id:
+        return None
+
+    cached = _user_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    result = await db.execute(_USER_BY_ID, {"user_id": user_id})
+    row = result.one_or_none()
+
+    if not row:
+        return None
+
+    snapshot = AuthenticatedUser.model_validate(row)
+    _user_cache.set(user_id, snapshot)
+
+    return snapshot
+
+
+def invalidate_api_key(key_hash: str) -> None:
+    """Drop a cached API key so revocations take effect immediately"""
+    _api_key_cache.pop(key_hash)
+
 
-    if not api_key_value.startswith("sk_live_"):
+async def publish_api_key_invalidation(db: AsyncSession, key_hash: str) -> None:
+    """
+    Tell every worker to drop a cached API key
+    Postgres delivers the notification only if the caller's transaction
+    commits, so call this before committing the change it announces
+    """
+    await db.execute(select(func.pg_notify(API_KEY_INVALIDATION_CHANNEL, key_hash)))
+
+
+def _on_api_key_invalidated(connection, pid, channel, key_hash) -> None:
+    _api_key_cache.pop(key_hash)
+
+
+async def run_api_key_invalidation_listener() -> None:
+    """
+    Drop cached API keys as other workers revoke them, until cancelled
+    Uses a dedicated connection outside the pool. Notifications sent while
+    it is down are lost, so the whole cache is cleared on every (re)connect
+    """
+    dsn = DATABASE_URL.set(drivername="postgresql").render_as_string(
+        hide_password=False
+    )
+
+    while True:
+        connection = None
+        try:
+            connection = await asyncpg.connect(dsn)
+            lost = asyncio.Event()
+            connection.add_termination_listener(lambda _: lost.set())
+            await connection.add_listener(
+                API_KEY_INVALIDATION_CHANNEL, _on_api_key_invalidated
+            )
+            _api_key_cache.clear()
+            await lost.wait()
+            logger.warning("API key invalidation listener lost its connection")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"API key invalidation listener failed: {str(e)}")
+        finally:
+            if connection is not None and not connection.is_closed():
+                await connection.close()
+
+        await asyncio.sleep(API_KEY_INVALIDATION_RECONNECT_SECONDS)
+
+
+async def _load_api_key(
+    db: AsyncSession, key_hash: str
+) -> Optional[Tuple[AuthenticatedAPIKey, Optional[AuthenticatedUser]]]:
+    """Resolve an API key and its owner, served from cache when warm"""
+    cached = _api_key_cache.get(key_hash)
+    if cached is not None:
+        return cached
+
+    result = await db.execute(_API_KEY_WITH_USER, {"key_hash": key_hash})
+    row = result.one_or_none()
+
+    if not row:
+        return None
+
+    user = None
+    if row.owner_id:
+        user = AuthenticatedUser(
+            id=row.owner_id,
+            email=row.owner_email,
+            name=row.owner_name,
+            is_active=row.owner_is_active,
+        )
+    entry = (AuthenticatedAPIKey.model_validate(row), user)
+
+    if user:
+        _api_key_cache.set(key_hash, entry)
+
+    return entry
+
+
+async def flush_api_key_usage() -> int:
+    """Write buffered last_used_at values in one batch; returns keys written"""
+    if not _pending_api_key_usage:
+        return 0
+
+    pending = dict(_pending_api_key_usage)
+    _pending_api_key_usage.clear()
+
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(
+                _TOUCH_API_KEYS,
+                [
+                    {
+                        "api_key_id": api_key_id,
+                        "used_at": datetime.fromtimestamp(used_at, timezone.utc),
+                    }
+                    for api_key_id, used_at in pending.items()
+                ],
+            )
+    except BaseException:
+        # Keep the batch for the next flush unless a newer use replaced it;
+        # this includes cancellation, so shutdown's final flush still has it
+        for api_key_id, used_at in pending.items():
+            _pending_api_key_usage.setdefault(api_key_id, used_at)
+        raise
+
+    return len(pending)
+
+
+async def run_api_key_usage_flusher() -> None:
+    """Periodically flush buffered API key usage until cancelled"""
+    while True:
+        await asyncio.sleep(API_KEY_USAGE_FLUSH_INTERVAL_SECONDS)
+        try:
+            count = await flush_api_key_usage()
+            if count:
+                logger.debug("Flushed last_used_at for %d API keys", count)
+        except Exception as e:
+            logger.error(f"Failed to flush API key usage: {str(e)}", exc_info=True)
+
+
+async def _get_user_from_api_key(
+    api_key_value: str, db: AsyncSession
+) -> Tuple[AuthenticatedUser, AuthenticatedAPIKey]:
+    """Get current user from API key"""
+    if not api_key_value.startswith(API_KEY_PREFIX):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid API key format. API keys must start with 'sk_live_'",
+            detail=f"Invalid API key format. API keys must start with '{API_KEY_PREFIX}'",
         )
 
     key_hash = hash_api_key(api_key_value)
 
-    result = db.execute(select(APIKey).where(APIKey.key_hash == key_hash))
-    api_key = result.scalar_one_or_none()
+    entry = await _load_api_key(db, key_hash)
 
-    if not api_key:
+    if not entry:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid API key. Key not found or incorrect.",
         )
 
+    api_key, user = entry
+
     if api_key.is_revoked:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -107,21 +303,14 @@ def get_current_user_from_api_key(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="API key is inactive"
         )
 
-    now = datetime.now(timezone.utc)
-    expires_at = api_key.expires_at
-
-    if expires_at.tzinfo is None:
-        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    now = time.time()
 
-    if expires_at <= now:
+    if api_key.expires_at_ts <= now:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail=f"API key expired on {expires_at.strftime('%Y-%m-%d %H:%M:%S UTC')}. Please use /keys/rollover to create a new key.",
+            detail=f"API key expired on {api_key.expires_at.strftime('%Y-%m-%d %H:%M:%S UTC')}. Please use /keys/rollover to create a new key.",
         )
 
-    result = db.execute(select(User).where(User.id == api_key.user_id))
-    user = result.scalar_one_or_none()
-
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -134,34 +323,33 @@ def get_current_user_from_api_key(
             detail="User account is inactive",
         )
 
-    api_key.last_used_at = datetime.now(timezone.utc)
-    db.commit()
+    _pending_api_key_usage[api_key.id] = now
 
-    logger.debug(f"Authenticated user {user.id} via API key")
+    logger.debug("Authenticated user %s via API key", user.id)
     return user, api_key
 
 
-def get_current_user(
-    jwt_user: Optional[User] = Depends(get_current_user_from_jwt),
-    api_key_data: Tuple[Optional[User], Optional[APIKey]] = Depends(
-        get_current_user_from_api_key
-    ),
-) -> Tuple[User, Optional[APIKey]]:
+async def get_current_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+    api_key_value: Optional[str] = Depends(api_key_scheme),
+    db: AsyncSession = Depends(get_db),
+) -> Tuple[AuthenticatedUser, Optional[AuthenticatedAPIKey]]:
     """
     Get current user from either JWT or API key
-    Returns: (User, Optional[APIKey])
+    Returns: (AuthenticatedUser, Optional[AuthenticatedAPIKey])
 
     Supports both authentication methods:
     - JWT Bearer Token (via Authorization header)
     - API Key (via x-api-key header)
-    """
-    api_user, api_key = api_key_data
 
-    if jwt_user:
-        return jwt_user, None
+    Only the supplied credential is checked; a JWT takes precedence and the
+    API key is not looked up when both headers are present.
+    """
+    if credentials:
+        return await _get_user_from_jwt(credentials.credentials, db), None
 
-    if api_user:
-        return api_user, api_key
+    if api_key_value:
+        return await _get_user_from_api_key(api_key_value, db)
 
     raise HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -183,28 +371,33 @@ def require_permission(permission: str):
     - transfer: Transfer funds
     """
 
-    def check_permission(
-        current_user_data: Tuple[User, Optional[APIKey]] = Depends(get_current_user),
-    ) -> User:
+    async def check_permission(
+        current_user_data: Tuple[
+            AuthenticatedUser, Optional[AuthenticatedAPIKey]
+        ] = Depends(get_current_user),
+    ) -> AuthenticatedUser:
         user, api_key = current_user_data
 
         if api_key is None:
-            logger.debug(f"JWT user {user.id} has all permissions")
+            logger.debug("JWT user %s has all permissions", user.id)
             return user
 
         if permission not in api_key.permissions:
+            granted = ", ".join(sorted(api_key.permissions))
             logger.warning(
-                f"API key {api_key.id} missing permission '{permission}' "
-                f"(has: {api_key.permissions})"
+                "API key %s missing permission '%s' (has: %s)",
+                api_key.id,
+                permission,
+                granted,
             )
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Permission denied. Your API key requires '{permission}' permission. "
-                f"Current permissions: {', '.join(api_key.permissions)}. "
+                f"Current permissions: {granted}. "
                 f"Create a new key with the required permission.",
             )
 
-        logger.debug(f"API key user {user.id} has '{permission}' permission")
+        logger.debug("API key user %s has '%s' permission", user.id, permission)
         return user
 
     return check_permission
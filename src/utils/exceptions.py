@@ -67,3 +67,9 @@ class DuplicateTransactionError(WalletServiceError):
     """Raised when attempting to process duplicate transaction"""
 
     pass
+
+
+class WebhookSignatureError(ValueError):
+    """Raised when a webhook's signature is missing or does not verify"""
+
+    pass
@@ -0,0 +1,159 @@
+"""
+Ingress Rate Limiting Middleware
+"""
+
+import os
+import time
+from typing import Iterable
+
+from fastapi import status
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.utils.cache import TTLCache
+from src.utils.responses import error_response
+
+WEBHOOK_RATE_LIMIT_CAPACITY = int(os.getenv("WEBHOOK_RATE_LIMIT_CAPACITY", "60"))
+WEBHOOK_RATE_LIMIT_REFILL_PER_SECOND = float(
+    os.getenv("WEBHOOK_RATE_LIMIT_REFILL_PER_SECOND", "1")
+)
+RATE_LIMIT_MAX_CLIENTS = 10_000
+
+# Paystack's published webhook source IPs; never throttled
+PAYSTACK_WEBHOOK_IPS = frozenset(
+    ip.strip()
+    for ip in os.getenv(
+        "PAYSTACK_WEBHOOK_IPS", "52.31.139.75,52.49.173.169,52.214.14.220"
+    ).split(",")
+    if ip.strip()
+)
+
+# Reverse proxies whose X-Forwarded-For is trusted to name the real client.
+# Must be set behind a proxy, or every caller shares the proxy's bucket and
+# the Paystack exemption never matches
+TRUSTED_PROXY_IPS = frozenset(
+    ip.strip() for ip in os.getenv("TRUSTED_PROXY_IPS", "").split(",") if ip.strip()
+)
+
+
+# Request state flag a handler sets to hand back its admission token
+_REFUND_STATE_KEY = "rate_limit_refund"
+
+
+def refund_rate_limit(request: Request) -> None:
+    """Mark a counted response as not the client's fault, returning its token"""
+    setattr(request.state, _REFUND_STATE_KEY, True)
+
+
+def client_ip(scope: Scope) -> str:
+    """
+    Resolve the caller's IP, looking through trusted proxies only
+    The right-most X-Forwarded-For hop that is not a trusted proxy is the
+    client; anything left of it could have been forged by that client
+    """
+    peer = scope["client"][0] if scope.get("client") else "unknown"
+    if peer not in TRUSTED_PROXY_IPS:
+        return peer
+
+    forwarded = ",".join(
+        value.decode("latin-1")
+        for name, value in scope.get("headers", [])
+        if name == b"x-forwarded-for"
+    )
+    hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+
+    for hop in reversed(hops):
+        if hop not in TRUSTED_PROXY_IPS:
+            return hop
+
+    return hops[0] if hops else peer
+
+
+class TokenBucketMiddleware:
+    """
+    Per-client-IP token bucket in front of selected paths
+    Every admitted request takes a token up front, so a concurrent flood is
+    cut off at the bucket size before any handler work runs. The token is
+    handed back once the response starts unless its status is counted (by
+    default 401) and the handler did not call refund_rate_limit. Handlers
+    refund failures that are not the caller's fault, such as correctly
+    signed webhooks carrying bad data. Exempt IPs bypass the limiter.
+    Buckets are per worker
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        paths: Iterable[str],
+        capacity: int = WEBHOOK_RATE_LIMIT_CAPACITY,
+        refill_per_second: float = WEBHOOK_RATE_LIMIT_REFILL_PER_SECOND,
+        exempt_ips: Iterable[str] = (),
+        counted_statuses: Iterable[int] = (status.HTTP_401_UNAUTHORIZED,),
+    ):
+        self.app = app
+        self.paths = frozenset(paths)
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.exempt_ips = frozenset(exempt_ips)
+        self.counted_statuses = frozenset(counted_statuses)
+        # An idle bucket is full again after this long, so dropping it then
+        # is indistinguishable from keeping it
+        self._buckets = TTLCache(
+            maxsize=RATE_LIMIT_MAX_CLIENTS, ttl=capacity / refill_per_second
+        )
+
+    # Neither helper awaits, so their read-modify-writes cannot interleave
+
+    def _tokens(self, client: str, now: float) -> float:
+        tokens, updated_at = self._buckets.get(client, (self.capacity, now))
+        return min(self.capacity, tokens + (now - updated_at) * self.refill_per_second)
+
+    def _take(self, client: str) -> bool:
+        now = time.monotonic()
+        tokens = self._tokens(client, now)
+
+        if tokens < 1:
+            self._buckets.set(client, (tokens, now))
+            return False
+
+        self._buckets.set(client, (tokens - 1, now))
+        return True
+
+    def _refund(self, client: str) -> None:
+        now = time.monotonic()
+        self._buckets.set(
+            client, (min(self.capacity, self._tokens(client, now) + 1), now)
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        client = client_ip(scope)
+
+        if client in self.exempt_ips:
+            await self.app(scope, receive, send)
+            return
+
+        if not self._take(client):
+            response = error_response(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                message="Too many requests. Please retry later",
+                error="RATE_LIMITED",
+            )
+            await response(scope, receive, send)
+            return
+
+        # Shared with the handler's request.state so refund_rate_limit is seen
+        state = scope.setdefault("state", {})
+
+        async def send_and_settle(message: Message) -> None:
+            if message["type"] == "http.response.start" and (
+                message["status"] not in self.counted_statuses
+                or state.get(_REFUND_STATE_KEY)
+            ):
+                self._refund(client)
+            await send(message)
+
+        await self.app(scope, receive, send_and_settle)
@@ -2,25 +2,48 @@
 Security and Authentication Utilities
 """
 
-import hashlib
 import hmac
 import os
 import secrets
+import time
 from datetime import datetime, timedelta, timezone
+from hashlib import sha256, sha512
 from typing import Optional
 
 import jwt
 from dotenv import load_dotenv
 
+from src.utils.cache import TTLCache
+
 load_dotenv()
 
 # Configuration
 JWT_SECRET = os.getenv("JWT_SECRET", "your-secret-key-change-in-production")
 JWT_ALGORITHM = "HS256"
+# Derived once so encode/decode do not rebuild them on every call
+_JWT_KEY = JWT_SECRET.encode("utf-8")
+_JWT_ALGORITHMS = [JWT_ALGORITHM]
 JWT_EXPIRATION_HOURS = 24
+JWT_CACHE_TTL_SECONDS = int(os.getenv("JWT_CACHE_TTL_SECONDS", "60"))
+JWT_CACHE_MAXSIZE = 10_000
+
+API_KEY_PREFIX = "sk_live_"
 
 PAYSTACK_SECRET_KEY = os.getenv("PAYSTACK_SECRET_KEY", "")
 
+# Raw HMAC-SHA512 digest size
+PAYSTACK_SIGNATURE_LENGTH = 64
+
+# Keyed HMAC state derived once at import; each verification copies it
+_paystack_hmac = (
+    hmac.new(PAYSTACK_SECRET_KEY.encode("utf-8"), digestmod=sha512)
+    if PAYSTACK_SECRET_KEY
+    else None
+)
+
+# raw token -> verified payload; failed decodes are never stored
+_jwt_cache = TTLCache(maxsize=JWT_CACHE_MAXSIZE, ttl=JWT_CACHE_TTL_SECONDS)
+
 
 def create_jwt_token(user_id: str, email: str) -> str:
     """Create JWT token for user"""
@@ -30,28 +53,40 @@ def create_jwt_token(user_id: str, email: str) -> str:
         "exp": datetime.now(timezone.utc) + timedelta(hours=JWT_EXPIRATION_HOURS),
         "iat": datetime.now(timezone.utc),
     }
-    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+    return jwt.encode(payload, _JWT_KEY, algorithm=JWT_ALGORITHM)
 
 
 def decode_jwt_token(token: str) -> Optional[dict]:
-    """Decode and verify JWT token"""
-    try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    """Decode and verify JWT token, reusing recent verifications"""
+    payload = _jwt_cache.get(token)
+    if payload is not None:
         return payload
+
+    try:
+        payload = jwt.decode(token, _JWT_KEY, algorithms=_JWT_ALGORITHMS)
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
         return None
 
+    # Never serve a cached payload past the token's own expiry
+    ttl = JWT_CACHE_TTL_SECONDS
+    if "exp" in payload:
+        ttl = min(ttl, payload["exp"] - time.time())
+    if ttl > 0:
+        _jwt_cache.set(token, payload, ttl=ttl)
+
+    return payload
+
 
 def generate_api_key() -> str:
     """Generate a secure API key"""
-    return f"sk_live_{secrets.token_urlsafe(32)}"
+    return f"{API_KEY_PREFIX}{secrets.token_urlsafe(32)}"
 
 
 def hash_api_key(api_key: str) -> str:
     """Hash API key for storage"""
-    return hashlib.sha256(api_key.encode()).hexdigest()
+    return sha256(api_key.encode()).hexdigest()
 
 
 def parse_expiry(expiry: str) -> datetime:
@@ -73,17 +108,22 @@ def parse_expiry(expiry: str) -> datetime:
         raise ValueError(f"Invalid expiry format: {expiry}")
 
 
-def verify_paystack_signature(payload: bytes, signature: str) -> bool:
+def verify_paystack_signature(payload: bytes, signature: bytes) -> bool:
     """
     Verify Paystack webhook signature
+    Expects the raw digest bytes, already decoded from the hex header
     """
     if not PAYSTACK_SECRET_KEY:
         raise ValueError("PAYSTACK_SECRET_KEY not configured")
 
-    hash_object = hmac.new(PAYSTACK_SECRET_KEY.encode("utf-8"), payload, hashlib.sha512)
-    expected_signature = hash_object.hexdigest()
+    # A signature of the wrong length can never match; skip hashing the body
+    if len(signature) != PAYSTACK_SIGNATURE_LENGTH:
+        return False
+
+    hash_object = _paystack_hmac.copy()
+    hash_object.update(payload)
 
-    return hmac.compare_digest(expected_signature, signature)
+    return hmac.compare_digest(hash_object.digest(), signature)
 
 
 def generate_transaction_reference() -> str:
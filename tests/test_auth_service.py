@@ -0,0 +1,93 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.services import auth_service as auth_module
+from src.services.auth_service import AuthService
+
+
+class _DummySession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(auth_module, "SessionLocal", _DummySession)
+    service = AuthService()
+    service.exchanges = []
+    service.release = None
+
+    async def exchange_code_for_token(code):
+        service.exchanges.append(code)
+        await service.release.wait()
+        return {"access_token": "google-token"}
+
+    async def get_user_info(access_token):
+        return {"email": "user@example.com", "id": "google-1", "name": "User"}
+
+    async def get_or_create_user(db, email, google_id, name, picture):
+        return SimpleNamespace(id="user-1", email=email)
+
+    monkeypatch.setattr(service, "exchange_code_for_token", exchange_code_for_token)
+    monkeypatch.setattr(service, "get_user_info", get_user_info)
+    monkeypatch.setattr(service, "_get_or_create_user", get_or_create_user)
+    return service
+
+
+def test_concurrent_callbacks_share_one_exchange(service):
+    async def run():
+        service.release = asyncio.Event()
+        callers = [
+            asyncio.ensure_future(service.handle_google_callback("code-1"))
+            for _ in range(5)
+        ]
+        await asyncio.sleep(0)
+        service.release.set()
+        return await asyncio.gather(*callers)
+
+    tokens = asyncio.run(run())
+
+    assert service.exchanges == ["code-1"]
+    assert len({token.access_token for token in tokens}) == 1
+    assert service._inflight == {}
+
+
+@pytest.mark.parametrize("cancelled", [0, 1])
+def test_cancelled_waiter_does_not_cancel_the_others(service, cancelled):
+    async def run():
+        service.release = asyncio.Event()
+        callers = [
+            asyncio.ensure_future(service.handle_google_callback("code-1"))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        callers[cancelled].cancel()
+        await asyncio.sleep(0)
+        service.release.set()
+        return await asyncio.gather(*callers, return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert isinstance(results[cancelled], asyncio.CancelledError)
+    survivors = [r for i, r in enumerate(results) if i != cancelled]
+    assert all(r.token_type == "bearer" for r in survivors)
+    assert service.exchanges == ["code-1"]
+
+
+def test_finished_callback_is_not_reused(service):
+    async def run():
+        service.release = asyncio.Event()
+        service.release.set()
+        first = await service.handle_google_callback("code-1")
+        second = await service.handle_google_callback("code-1")
+        return first, second
+
+    asyncio.run(run())
+
+    # Entries are dropped once done, so a later caller starts a fresh flow
+    assert service.exchanges == ["code-1", "code-1"]
@@ -0,0 +1,55 @@
+from src.utils import cache
+from src.utils.cache import TTLCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    entries = TTLCache(maxsize=10, ttl=30)
+
+    entries.set("default", 1)
+    entries.set("short", 2, ttl=5)
+
+    clock.now += 5
+    assert entries.get("short") is None
+    assert entries.get("default") == 1
+
+    clock.now += 25
+    assert entries.get("default", "gone") == "gone"
+    assert len(entries) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    entries = TTLCache(maxsize=2, ttl=60)
+
+    entries.set("a", 1)
+    entries.set("b", 2)
+    # Reading "a" makes "b" the least recently used
+    assert entries.get("a") == 1
+    entries.set("c", 3)
+
+    assert entries.get("b") is None
+    assert entries.get("a") == 1
+    assert entries.get("c") == 3
+    assert len(entries) == 2
+
+
+def test_pop_and_clear_invalidate():
+    entries = TTLCache(maxsize=10, ttl=60)
+    entries.set("a", 1)
+    entries.set("b", 2)
+
+    entries.pop("a")
+    entries.pop("missing")
+    assert entries.get("a") is None
+
+    entries.clear()
+    assert len(entries) == 0
@@ -0,0 +1,82 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
+
+from src.utils.rate_limit import TokenBucketMiddleware, refund_rate_limit
+
+PATH = "/webhook"
+CAPACITY = 5
+
+
+def _build_app(status_code: int, refund: bool = False, exempt_ips=()):
+    app = FastAPI()
+    calls = []
+
+    @app.post(PATH)
+    async def handler(request: Request):
+        calls.append(1)
+        # Hold every admitted request open so the burst is truly concurrent
+        await asyncio.sleep(0.05)
+        if refund:
+            refund_rate_limit(request)
+        return JSONResponse(status_code=status_code, content={})
+
+    app.add_middleware(
+        TokenBucketMiddleware,
+        paths=[PATH],
+        capacity=CAPACITY,
+        refill_per_second=0.001,
+        exempt_ips=exempt_ips,
+    )
+    return app, calls
+
+
+def _burst(app: FastAPI, count: int) -> list:
+    async def run():
+        transport = httpx.ASGITransport(app=app, client=("203.0.113.7", 1234))
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            responses = await asyncio.gather(*(client.post(PATH) for _ in range(count)))
+        return [response.status_code for response in responses]
+
+    return asyncio.run(run())
+
+
+def test_concurrent_burst_is_cut_off_at_capacity():
+    app, calls = _build_app(status.HTTP_401_UNAUTHORIZED)
+
+    statuses = _burst(app, 50)
+
+    assert len(calls) == CAPACITY
+    assert statuses.count(status.HTTP_401_UNAUTHORIZED) == CAPACITY
+    assert statuses.count(status.HTTP_429_TOO_MANY_REQUESTS) == 50 - CAPACITY
+
+
+def test_uncounted_status_refunds_its_token():
+    app, calls = _build_app(status.HTTP_200_OK)
+
+    for _ in range(3):
+        assert _burst(app, CAPACITY) == [status.HTTP_200_OK] * CAPACITY
+
+    assert len(calls) == 3 * CAPACITY
+
+
+def test_handler_refund_returns_token_on_counted_status():
+    app, calls = _build_app(status.HTTP_401_UNAUTHORIZED, refund=True)
+
+    for _ in range(3):
+        assert _burst(app, CAPACITY) == [status.HTTP_401_UNAUTHORIZED] * CAPACITY
+
+    assert len(calls) == 3 * CAPACITY
+
+
+def test_exempt_ip_is_never_throttled():
+    app, calls = _build_app(status.HTTP_401_UNAUTHORIZED, exempt_ips=["203.0.113.7"])
+
+    statuses = _burst(app, 3 * CAPACITY)
+
+    assert statuses == [status.HTTP_401_UNAUTHORIZED] * (3 * CAPACITY)
+    assert len(calls) == 3 * CAPACITY
@@ -0,0 +1,53 @@
+import time
+
+import jwt
+
+from src.utils import security
+
+
+def _token(exp: float) -> str:
+    payload = {"user_id": "user-1", "email": "user@example.com", "exp": int(exp)}
+    return jwt.encode(payload, security._JWT_KEY, algorithm=security.JWT_ALGORITHM)
+
+
+def _record_cache_ttls(monkeypatch) -> list:
+    ttls = []
+    set_entry = security._jwt_cache.set
+
+    def recording_set(key, value, ttl=None):
+        ttls.append(ttl)
+        set_entry(key, value, ttl=ttl)
+
+    security._jwt_cache.clear()
+    monkeypatch.setattr(security, "JWT_CACHE_TTL_SECONDS", 60)
+    monkeypatch.setattr(security._jwt_cache, "set", recording_set)
+    return ttls
+
+
+def test_jwt_cache_ttl_is_capped_at_token_expiry(monkeypatch):
+    ttls = _record_cache_ttls(monkeypatch)
+    token = _token(time.time() + 5)
+
+    payload = security.decode_jwt_token(token)
+
+    assert payload["user_id"] == "user-1"
+    assert len(ttls) == 1
+    assert 0 < ttls[0] <= 5
+    assert security.decode_jwt_token(token) == payload
+    assert len(ttls) == 1
+
+
+def test_jwt_cache_ttl_defaults_to_configured_ttl(monkeypatch):
+    ttls = _record_cache_ttls(monkeypatch)
+
+    security.decode_jwt_token(_token(time.time() + 3600))
+
+    assert ttls == [60]
+
+
+def test_invalid_jwt_is_not_cached(monkeypatch):
+    ttls = _record_cache_ttls(monkeypatch)
+
+    assert security.decode_jwt_token("not-a-token") is None
+    assert security.decode_jwt_token(_token(time.time() - 10)) is None
+    assert ttls == []
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+from sqlalchemy.exc import DBAPIError
+
+from src.db import session
+from src.db.session import run_serializable
+
+
+class _FakeSession:
+    def __init__(self):
+        self.rollbacks = 0
+        self.isolation_levels = []
+
+    def in_transaction(self) -> bool:
+        return False
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+    async def connection(self, execution_options=None):
+        self.isolation_levels.append(execution_options["isolation_level"])
+
+
+class _DriverError(Exception):
+    def __init__(self, sqlstate: str):
+        super().__init__(sqlstate)
+        self.sqlstate = sqlstate
+
+
+def _db_error(sqlstate: str) -> DBAPIError:
+    return DBAPIError("UPDATE wallets", {}, _DriverError(sqlstate))
+
+
+def _failing(errors: list, result="done"):
+    calls = []
+
+    async def operation():
+        calls.append(1)
+        if errors:
+            raise errors.pop(0)
+        return result
+
+    return operation, calls
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(session, "SERIALIZABLE_BACKOFF_SECONDS", 0)
+
+
+@pytest.mark.parametrize("sqlstate", ["40001", "40P01"])
+def test_retries_serialization_failures(sqlstate):
+    db = _FakeSession()
+    operation, calls = _failing([_db_error(sqlstate), _db_error(sqlstate)])
+
+    assert asyncio.run(run_serializable(db, operation)) == "done"
+    assert len(calls) == 3
+    assert db.rollbacks == 2
+    assert db.isolation_levels == ["SERIALIZABLE"] * 3
+
+
+def test_gives_up_after_max_attempts():
+    db = _FakeSession()
+    errors = [_db_error("40001")] * session.SERIALIZABLE_MAX_ATTEMPTS
+    operation, calls = _failing(list(errors))
+
+    with pytest.raises(DBAPIError):
+        asyncio.run(run_serializable(db, operation))
+    assert len(calls) == session.SERIALIZABLE_MAX_ATTEMPTS
+
+
+@pytest.mark.parametrize(
+    "error", [_db_error("23505"), ValueError("Insufficient balance")]
+)
+def test_other_errors_are_reraised_without_retry(error):
+    db = _FakeSession()
+    operation, calls = _failing([error])
+
+    with pytest.raises(type(error)):
+        asyncio.run(run_serializable(db, operation))
+    assert len(calls) == 1
+    assert db.rollbacks == 1
@@ -0,0 +1,18 @@
+from src.routes.wallet_routes import _paystack_signature
+
+
+def test_missing_signature_is_none():
+    assert _paystack_signature(None) is None
+    assert _paystack_signature("") is None
+
+
+def test_malformed_signature_is_empty():
+    assert _paystack_signature("zz") == b""
+    assert _paystack_signature("abc") == b""
+
+
+def test_signature_hex_is_case_insensitive():
+    digest = bytes(range(64))
+
+    assert _paystack_signature(digest.hex()) == digest
+    assert _paystack_signature(digest.hex().upper()) == digest